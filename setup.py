@@ -1,15 +1,26 @@
+import os
+
 from setuptools import setup, find_packages
 
+# Setting NEX_MYPYC=1 compiles src/project.py to a C extension with mypyc.  Without it (or if the compiled module is
+# missing) the pure python module is imported as normal.
+ext_modules = []
+if os.environ.get("NEX_MYPYC"):
+    from mypyc.build import mypycify
+    ext_modules = mypycify(["--ignore-missing-imports", "src/project.py"])
+
 setup(
     name='nex',
     version='0.0.4',
     packages=find_packages(),
     py_modules=['src'],
     include_package_data=True,
+    ext_modules=ext_modules,
     install_requires=[
         'Click',
         'gitpython',
         'munch',
+        'orjson',
         'semver'
     ],
     entry_points='''
@@ -1,6 +1,7 @@
 import click
 
 from os import getcwd
+from typing import List
 
 from munch import DefaultMunch
 
@@ -18,8 +19,11 @@ from src.project import ActionResult, ProjectManager, Project, ActionMessage
               help="The type of project to run against.  This can be one of the following: 'nexus-module', "
                    "'nexus-connection', 'nexus-app'")
 @click.option('--dry-run', is_flag=True, required=False)
+@click.option('--offline', is_flag=True, required=False,
+              help="Don't fetch from the remotes or ask the registry for published versions.  Ahead/behind counts "
+                   "are then against the last fetch and only versions looked up by an earlier run are shown")
 @click.pass_context
-def cli(ctx, root, project, branch, remote, projtype, dry_run):
+def cli(ctx, root, project, branch, remote, projtype, dry_run, offline):
     if not ctx.obj:
         ctx.obj = DefaultMunch(None, {})
 
@@ -27,6 +31,7 @@ def cli(ctx, root, project, branch, remote, projtype, dry_run):
     ctx.obj.branch = branch
     ctx.obj.remote = remote
     ctx.obj.dry_run = dry_run or False
+    ctx.obj.offline = offline or False
 
     click.secho("Nexus Builder", bold=True)
     click.echo("--------------------------")
@@ -36,17 +41,42 @@ def cli(ctx, root, project, branch, remote, projtype, dry_run):
     click.echo(f"{click.style('type', bold=True, fg='green')}\t\t{projtype or 'N/A'}")
     click.echo("--------------------------")
 
-    ctx.obj.manager = ProjectManager(ctx.obj.path, branch=ctx.obj.branch, remote=ctx.obj.remote,
-                                     dry_run=ctx.obj.dry_run, project=project, projtype=projtype)
+    # The manager is only built once a command actually needs it.
+    ctx.obj.manager_args = dict(branch=ctx.obj.branch, remote=ctx.obj.remote, dry_run=ctx.obj.dry_run,
+                                project=project, projtype=projtype)
+
+
+def get_manager(ctx) -> ProjectManager:
+    if not ctx.obj.manager:
+        ctx.obj.manager = ProjectManager(ctx.obj.path, **ctx.obj.manager_args)
+
+    return ctx.obj.manager
+
+
+def refresh_remotes(ctx, manager: ProjectManager):
+    # Reads every project's git state up front, fetching first unless running offline.
+    if ctx.obj.offline:
+        manager.load_git_info()
+    else:
+        manager.refresh_remotes()
+
+
+def echo_lines(lines: List[str]):
+    # Writes a batch of output in one go rather than one write per line.
+    if lines:
+        click.echo("\n".join(lines))
 
 
 @cli.command(name="list")
 @click.pass_context
 def list_(ctx):
-    final_projects = ctx.obj.manager.get_projects()
+    manager = get_manager(ctx)
+    final_projects = manager.get_projects()
+    refresh_remotes(ctx, manager)
+    if not ctx.obj.offline:
+        manager.prefetch_remote_versions()
 
-    for proj in final_projects:
-        click.echo(repr(proj))
+    echo_lines([repr(proj) for proj in final_projects])
 
     if not len(final_projects):
         click.echo(repr(ActionMessage("list", "Unable to find any nexus projects")))
@@ -56,86 +86,85 @@ def list_(ctx):
 @click.option('-m', '--msg', required=True)
 @click.pass_context
 def commit(ctx, msg):
-    final_projects = ctx.obj.manager.get_projects()
+    manager = get_manager(ctx)
+    final_projects = manager.get_projects()
+    results = manager.map(Project.commit, msg)
 
-    for proj in final_projects:
-        click.echo(f'{proj.get_name()}:')
-        result = proj.commit(msg)
-        click.echo(repr(result))
+    echo_lines([f'{proj.get_name()}:\n{repr(result)}' for proj, result in zip(final_projects, results)])
 
 
 @cli.command()
 @click.pass_context
 def push(ctx):
-    final_projects = ctx.obj.manager.get_projects()
+    manager = get_manager(ctx)
+    final_projects = manager.get_projects()
+    results = manager.map(Project.push)
 
-    for proj in final_projects:
-        click.echo(f'{proj.get_name()}:')
-        result = proj.push()
-        click.echo(repr(result))
+    echo_lines([f'{proj.get_name()}:\n{repr(result)}' for proj, result in zip(final_projects, results)])
 
 
 @cli.command()
 @click.pass_context
 def update(ctx):
-    final_projects = ctx.obj.manager.get_projects()
+    manager = get_manager(ctx)
+    final_projects = manager.get_projects()
+    results = manager.map(Project.update)
 
-    for proj in final_projects:
-        click.echo(f'{proj.get_name()}:')
-        result = proj.update()
-        click.echo(repr(result))
+    echo_lines([f'{proj.get_name()}:\n{repr(result)}' for proj, result in zip(final_projects, results)])
 
 
 @cli.command()
 @click.pass_context
 def publish(ctx):
-    final_projects = ctx.obj.manager.get_projects()
+    manager = get_manager(ctx)
+    final_projects = manager.get_projects()
+    results = manager.map(Project.publish)
 
-    for proj in final_projects:
-        click.echo(f'{proj.get_name()}:')
-        result = proj.publish()
-        click.echo(repr(result))
+    echo_lines([f'{proj.get_name()}:\n{repr(result)}' for proj, result in zip(final_projects, results)])
 
 
 @cli.command()
 @click.option("-v", "--version_type", type=click.Choice(["patch", "minor", "major"]), default="patch")
 @click.pass_context
 def version(ctx, version_type):
-    final_projects = ctx.obj.manager.get_projects()
+    manager = get_manager(ctx)
+    final_projects = manager.get_projects()
 
-    for proj in final_projects:
-        result = proj.increment_version(version_type)
-        click.echo(repr(result))
+    echo_lines([repr(proj.increment_version(version_type)) for proj in final_projects])
+
+
+def sync_project(proj: Project, msg: str) -> bool:
+    steps = [(proj.is_dirty, "Committing local changes...", lambda: proj.commit(msg)),
+             (proj.need_fetch, "Pulling from remote...", proj.pull),
+             (proj.need_push, "Pushing to remote...", proj.push)]
+
+    # Progress is written once the project is done so projects syncing in parallel don't interleave their lines.
+    lines = []
+    succeeded = True
+    for needed, message, action in steps:
+        if needed():
+            lines.append(repr(ActionMessage("sync", f"{proj.get_name()}: {message}")))
+            if not action().success:
+                succeeded = False
+                break
+
+    echo_lines(lines)
+    return succeeded
 
 
 @cli.command()
 @click.option("-m", "--msg", help="The commit message to use if a commit must be made")
 @click.pass_context
 def sync(ctx, msg):
-    final_projects = ctx.obj.manager.get_projects()
-
-    succeeded = 0
-    for proj in final_projects:
-
-        if proj.is_dirty():
-            click.echo(repr(ActionMessage("sync", "Committing local changes...")))
-            result = proj.commit(msg)
-            if not result.success:
-                continue
-
-        if proj.need_fetch():
-            click.echo(repr(ActionMessage("sync", "Pulling from remote...")))
-            result = proj.pull()
-            if not result.success:
-                continue
+    manager = get_manager(ctx)
+    final_projects = manager.get_projects()
+    refresh_remotes(ctx, manager)
 
-        if proj.need_push():
-            click.echo(repr(ActionMessage("sync", "Pushing to remote...")))
-            result = proj.push()
-            if not result.success:
-                continue
+    results = manager.map(sync_project, msg, action="sync")
 
-        succeeded += 1
+    # a project that raised comes back as a failed result rather than False
+    echo_lines([repr(result) for result in results if isinstance(result, ActionResult)])
+    succeeded = sum(1 for result in results if result is True)
 
     click.echo(
         repr(ActionResult("sync", f"Completed sync with {succeeded} out of {len(final_projects)} succeeding", True)))
@@ -144,11 +173,10 @@ def sync(ctx, msg):
 @cli.command()
 @click.pass_context
 def link(ctx):
-    final_projects = ctx.obj.manager.get_projects()
+    manager = get_manager(ctx)
+    final_projects = manager.get_projects()
 
-    for proj in final_projects:
-        result = proj.link_global()
-        click.echo(repr(result))
+    echo_lines([repr(proj.link_global()) for proj in final_projects])
 
 
 @cli.command()
@@ -156,11 +184,12 @@ def link(ctx):
 @click.option("-m", "--msg", type=str)
 @click.pass_context
 def deploy(ctx, version_type, msg):
-    final_projects = ctx.obj.manager.get_projects()
+    manager = get_manager(ctx)
+    refresh_remotes(ctx, manager)
+    # each project looks its version up in its own deploy
+    results = manager.map(lambda proj: proj.deploy(msg=msg, version_type=version_type), action="deploy")
 
-    for proj in final_projects:
-        result = proj.deploy(msg=msg, version_type=version_type)
-        click.echo(repr(result))
+    echo_lines([repr(result) for result in results])
 
 
 if __name__ == "__main__":
@@ -1,126 +1,388 @@
+import atexit
 import json
 import os
+import re
 import subprocess
+import threading
+import time
 import click
-from json import JSONDecodeError
-from typing import List, Set
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
 import semver
 
 import logging
-from munch import DefaultMunch, Munch, munchify
-from git import Repo, GitCommandError
+from git import Commit, Git, GitCommandError, Repo
 
-keywords: Set[str] = {"nexus-module", "nexus-connection", "nexus-app"}
-names: List[str] = ["nexus-core", "nexus-extend"]
+if TYPE_CHECKING:
+    # only used in annotations, which aren't evaluated at runtime, and not in typing before 3.8
+    from typing_extensions import Final
 
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads  # type: ignore
 
-class ActionMessage(DefaultMunch):
-    def __init__(self, action, message):
-        super(ActionMessage, self).__init__(None, {
-            "action": action,
-            "message": message
-        })
+keywords: FrozenSet[str] = frozenset(("nexus-module", "nexus-connection", "nexus-app"))
+names: FrozenSet[str] = frozenset(("nexus-core", "nexus-extend"))
 
-    def __repr__(self):
+# Finds any of the names anywhere in a package name in one pass.
+name_pattern = re.compile("|".join(re.escape(n) for n in sorted(names)))
+
+# Files that mention none of the keywords or names are turned away on their raw bytes without being parsed.
+package_pattern = re.compile(b"|".join(re.escape(n.encode()) for n in sorted(keywords | names)))
+
+# Directories never descended into when looking for projects.  A ProjectManager can be given its own list.
+pruned_dirs: FrozenSet[str] = frozenset(("node_modules", ".git", ".venv", "__pycache__", ".cache", "dist", "build"))
+
+# Folders that hold packages in the usual monorepo layouts.
+monorepo_dirs: List[str] = ["packages", "apps"]
+
+# How git reports that there was nothing to commit.  Older versions said "directory", newer ones say "tree".
+clean_pattern = re.compile(r"nothing to commit|working (tree|directory) clean")
+
+# The line of npm's error output that names what went wrong, in both the old and new npm formats.
+npm_code_pattern = re.compile(r"npm (ERR!|error) code ")
+
+# The only package.json fields a Project ever reads.  This is all that gets kept (and cached) from a parsed file.
+package_fields: List[str] = ["name", "version", "keywords"]
+
+
+class ActionMessage:
+    __slots__ = ("action", "message")
+
+    def __init__(self, action: str, message: str):
+        # Results are never changed once they're made.
+        self.action: Final = action
+        self.message: Final = message
+
+    def __repr__(self) -> str:
         return f'{self.get_type()} {self.action}: {self.message}'
 
-    def get_type(self):
+    def get_type(self) -> str:
         return "[i]"
 
 
 class ActionResult(ActionMessage):
-    def __init__(self, action, message, success):
+    __slots__ = ("success",)
+
+    def __init__(self, action: str, message: str, success: Optional[bool]):
         super(ActionResult, self).__init__(action, message)
-        self.success = success
+        self.success: Final = success
 
-    def get_type(self):
+    def get_type(self) -> str:
         return "[c]" if self.success else "[e]" if self.success is False else "[w]"
 
 
+def describe_error(e: Exception) -> str:
+    # One line on why a failed command failed: npm's error code line, otherwise the last thing the command printed.
+    stderr = getattr(e, "stderr", None)
+    if isinstance(stderr, bytes):
+        stderr = stderr.decode('utf-8', 'replace')
+
+    # GitCommandError hands back stderr wrapped as "stderr: '...'"
+    match = re.fullmatch(r"\s*stderr: '(.*)'\s*", stderr or "", re.DOTALL)
+    lines = [line.strip() for line in (match.group(1) if match else stderr or "").splitlines() if line.strip()]
+    if not lines:
+        return str(e)
+
+    logging.debug("\n".join(lines))
+    return next((line for line in lines if npm_code_pattern.match(line)), lines[-1])
+
+
+class ProjectSpec(NamedTuple):
+    # Everything needed to build a Project, gathered while looking for projects.
+    ob: dict
+    subdir: str
+    dirs: List[str]
+    files: List[str]
+
+
+class JsonCache:
+    # A dict kept in a JSON file under the user's cache directory, ignored if written with another format_key.
+
+    def __init__(self, path: str, format_key: Optional[list] = None):
+        self.path = path
+        self.format_key = format_key
+        self.entries: Dict[str, list] = {}
+        self._loaded = False
+        self._changed = False
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        if self._loaded:
+            return
+
+        # entries are read and added from several threads at once and all of them must wait for the file to be read
+        with self._lock:
+            if self._loaded:
+                return
+
+            try:
+                with open(self.path, 'rb') as fp:
+                    data = json_loads(fp.read())
+                if (isinstance(data, dict) and data.get("format") == self.format_key
+                        and isinstance(data.get("entries"), dict)):
+                    self.entries = data["entries"]
+            except (OSError, ValueError):
+                self.entries = {}
+
+            self._loaded = True
+            atexit.register(self.save)
+
+    def save(self) -> None:
+        if not self._changed:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}"
+            with open(tmp_path, 'w') as fp:
+                json.dump({"format": self.format_key, "entries": self.entries}, fp)
+            os.replace(tmp_path, self.path)
+            self._changed = False
+        except OSError as e:
+            logging.warning(f"Unable to write the cache {self.path}: {e}")
+
+
+class PackageCache(JsonCache):
+    # What was kept of each package.json, invalidated whenever the file's mtime or size changes.
+
+    def get(self, file: str, st: os.stat_result) -> Optional[list]:
+        self.load()
+        entry = self.entries.get(file)
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return entry
+
+        return None
+
+    def put(self, file: str, st: os.stat_result, package_ob: Optional[dict]) -> None:
+        self.load()
+        self.entries[file] = [st.st_mtime_ns, st.st_size, package_ob]
+        self._changed = True
+
+    def save(self) -> None:
+        # packages that have since been deleted or moved are dropped rather than kept forever
+        if self._changed:
+            self.entries = {file: entry for file, entry in self.entries.items() if os.path.exists(file)}
+        super().save()
+
+
+class VersionCache(JsonCache):
+    # The latest published version of each package and when it was looked up.
+
+    def get(self, name: str, max_age: Optional[float]) -> Optional[str]:
+        # max_age None accepts an entry however old it is
+        self.load()
+        entry = self.entries.get(name)
+        if entry and (max_age is None or time.time() - entry[1] < max_age):
+            return entry[0]
+
+        return None
+
+    def put(self, name: str, version: str) -> None:
+        self.load()
+        self.entries[name] = [version, time.time()]
+        self._changed = True
+
+    def discard(self, name: str) -> None:
+        self.load()
+        if self.entries.pop(name, None) is not None:
+            self._changed = True
+
+
+cache_dir = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "nex")
+# Which packages are kept and what is kept of them depends on these, so they make up the package cache's format
+package_cache = PackageCache(os.path.join(cache_dir, "packages.json"),
+                             [sorted(keywords), sorted(names), package_fields])
+version_cache = VersionCache(os.path.join(cache_dir, "versions.json"))
+
+# The most commits commits_ahead/commits_behind will read.  The counts are never limited.
+commit_list_limit: int = 100
+
+# The fetch options to use, worked out once from the installed git's version by get_fetch_options.
+fetch_options: Optional[List[str]] = None
+
+
+def get_fetch_options() -> List[str]:
+    # Each of the cheaper fetch options is only passed if the installed git is new enough to understand it.
+    global fetch_options
+    if fetch_options is None:
+        version: Tuple[int, ...] = (0,)
+        try:
+            match = re.search(r"(\d+)\.(\d+)", subprocess.run(["git", "--version"], capture_output=True,
+                                                              text=True).stdout)
+            if match:
+                version = (int(match.group(1)), int(match.group(2)))
+        except OSError:
+            pass
+
+        options = ["--quiet", "--no-tags"]
+        if version >= (2, 24):
+            options += ["--write-commit-graph", "--no-auto-gc"]
+        if version >= (2, 29):
+            options.append("--no-write-fetch-head")
+        fetch_options = options
+
+    return fetch_options
+
+
+# The labels a project is printed with never change so they're only styled once.
+version_label = click.style('Local/Remote Version:', bold=True)
+changes_label = click.style('Uncommitted Changes:', bold=True)
+ahead_behind_label = click.style('Behind/Ahead Remote:', bold=True)
+
+# How long (in seconds) an npm command may run before it's given up on.
+command_timeout: float = 300
+
+# Added to the environment of every git command so a credential prompt fails rather than hanging the pool.
+git_environment: Dict[str, str] = {"GIT_TERMINAL_PROMPT": "0"}
+
+# How long (in seconds) a published version looked up by an earlier run is shown without asking the registry again.
+version_max_age: float = 300
+
+
 class Project:
+    __slots__ = ("root_directory", "package_ob", "project_dirs", "project_files", "_git", "remote", "branch",
+                 "_remote_valid", "_branch_valid", "dry_run_mode", "_latest_remote_version", "_git_info_loaded",
+                 "_commit_counts", "_porcelain", "_refs", "_remotes", "_name",
+                 "_short_name")
 
     def __init__(self, package_ob: dict, root_dir: str,
                  dirs: list, files: list, remote: str, branch: str,
                  dry_run_mode: bool = False):
         self.root_directory = root_dir
-        self.package_ob = DefaultMunch(None, package_ob)
+        self.package_ob = package_ob
         self.project_dirs = dirs
         self.project_files = files
-        self.repo = None
+        self._git: Optional[Git] = None
         self.remote = remote
         self.branch = branch
-        self.remote_valid = False
-        self.branch_valid = False
-        self.commits_ahead = []
-        self.commits_behind = []
+        self._remote_valid = False
+        self._branch_valid = False
         self.dry_run_mode = dry_run_mode
-        self._latest_remote_version = None
+        self._latest_remote_version: Optional[str] = None
         self._git_info_loaded = False
-
-        self._load_git_info()
+        self._commit_counts = (0, 0)
+        self._porcelain: Optional[str] = None
+        self._refs: Optional[FrozenSet[str]] = None
+        self._remotes: Optional[FrozenSet[str]] = None
+        # both forms of the name are read constantly (output, lookups) and never change so they're worked out once
+        self._name: str = package_ob['name']
+        self._short_name = self._name[self._name.rfind("/") + 1:]
 
     @staticmethod
     def is_nexus_project(package_ob: dict) -> bool:
-        pm = DefaultMunch(None, package_ob)
-        if pm.keywords and len(set(pm.keywords).intersection(keywords)) > 0:
-            return True
-        else:
-            # Return true if the approved names are anywhere in the package name.
-            return len([p for p in names if pm.name.find(p) > -1]) > 0
+        # A package without a usable name can't be a project.
+        name = package_ob.get("name")
+        if not name or not isinstance(name, str):
+            return False
+
+        package_keywords = package_ob.get("keywords")
+        try:
+            if isinstance(package_keywords, list) and not keywords.isdisjoint(package_keywords):
+                return True
+        except TypeError:
+            # an unhashable entry (an object or list) in keywords - those files can still match on their name
+            pass
+
+        # Return true if the approved names are anywhere in the package name.
+        return name_pattern.search(name) is not None
 
     @staticmethod
-    def load_npm_package(file: str) -> [dict, None]:
+    def load_npm_package(file: str) -> Optional[dict]:
+        try:
+            file = os.path.abspath(file)
+            st = os.stat(file)
+        except OSError as e:
+            return None
+
+        cached = package_cache.get(file, st)
+        if cached:
+            return cached[2]
 
+        package_ob = None
         try:
-            with open(file, 'r') as fp:
-                package_ob = json.load(fp)
-                return package_ob if Project.is_nexus_project(package_ob) else None
-        except JSONDecodeError as e:
+            with open(file, 'rb') as fp:
+                data = fp.read()
+                ob = json_loads(data) if package_pattern.search(data) else None
+                if isinstance(ob, dict) and Project.is_nexus_project(ob):
+                    package_ob = {k: ob[k] for k in package_fields if k in ob}
+        except ValueError as e:
+            # not valid JSON, or (with the stdlib parser) not valid UTF-8 - it can't be a nexus package either way
             pass
 
-        except FileNotFoundError as e:
+        except OSError as e:
+            # gone, unreadable or not a file - nothing is cached so it's tried again next time
             return None
 
-        return None
+        package_cache.put(file, st, package_ob)
+        return package_ob
+
+    def __repr__(self) -> str:
+        # Only shows a published version that has already been looked up - printing never goes to the registry.
+        try:
+            changes = 'Yes' if self.is_dirty() else 'No'
+        except GitCommandError as e:
+            changes = f"unknown ({describe_error(e)})"
 
-    def __repr__(self):
         out = f"{click.style(self.get_name(), fg='green', bold=True)}\n" \
-              f"{click.style('Local/Remote Version:', bold=True)} {self.get_version()} / " \
-              f"{self._get_latest_remote_version()}" \
-              f"{click.style('Uncommitted Changes:', bold=True)} {'Yes' if self.is_dirty() else 'No'}\n" \
-              f"{click.style('Behind/Ahead Remote:', bold=True)} {len(self.commits_behind)}/{len(self.commits_ahead)}"
+              f"{version_label} {self.get_version() or 'unknown'} / {self.cached_remote_version() or 'unknown'}\n" \
+              f"{changes_label} {changes}\n" \
+              f"{ahead_behind_label} {self.behind_count}/{self.ahead_count}"
 
         return out
 
-    def deploy(self, msg: str = None, version_type: str = "patch"):
-        local_version = semver.parse_version_info(self.get_version())
-        remote_version = semver.parse_version_info(self._get_latest_remote_version())
+    def deploy(self, msg: Optional[str] = None, version_type: str = "patch") -> ActionResult:
+        # Progress messages are written together so parallel deploys don't interleave their output.
+        messages: List[str] = []
+        result = self._deploy(messages, msg, version_type)
+        if messages:
+            click.echo("\n".join(messages))
 
-        needs_publish = local_version > remote_version
-        out_of_date = local_version < remote_version
+        return result
 
-        is_dirty = self.is_dirty()
-        is_ahead = len(self.commits_ahead) > len(self.commits_behind)
-        is_behind = len(self.commits_behind) > len(self.commits_ahead)
+    def _deploy(self, messages: List[str], msg: Optional[str], version_type: str) -> ActionResult:
+        # The local git state is checked before the registry is asked for the published version.
+        try:
+            is_dirty = self.is_dirty()
+        except GitCommandError as e:
+            return ActionResult("deploy", f"Unable to read the git status of {self.get_name()}: {describe_error(e)}",
+                                False)
+        is_ahead = self.ahead_count > self.behind_count
+        is_behind = self.behind_count > self.ahead_count
 
         commit_required = is_dirty
         push_required = is_ahead and not is_behind
         pull_required = is_behind and not is_ahead
         merge_required = (is_ahead and is_behind) or (pull_required and is_dirty)
 
-        needs_versioning = (push_required or commit_required) and local_version <= remote_version
-
         if merge_required:
             return ActionResult("deploy", "It looks like your local repo is out of date - "
                                           "do a pull and merge if necessary", False)
 
+        version = self.get_version()
+        if not version:
+            return ActionResult("deploy", f"{self.get_name()} has no version in its package.json", False)
+
+        local_version = semver.parse_version_info(version)
+        try:
+            remote_version = semver.parse_version_info(self._get_latest_remote_version(max_age=0))
+        except (OSError, subprocess.SubprocessError) as e:
+            return ActionResult("deploy", f"Unable to look up the published version of {self.get_name()}: "
+                                          f"{describe_error(e)}", False)
+
+        needs_publish = local_version > remote_version
+        out_of_date = local_version < remote_version
+
+        needs_versioning = (push_required or commit_required) and local_version <= remote_version
+
         if out_of_date:
             return ActionResult("deploy", "Somehow your local package  version is less than the one "
-                                          "deployed to the registry.  Bailing out now while you resolve that...")
+                                          "deployed to the registry.  Bailing out now while you resolve that...", None)
 
         actions_taken = []
         if commit_required:
-            click.echo(repr(ActionMessage("deploy", f"{self.get_name()} has uncommitted changes. Committing...")))
+            messages.append(repr(ActionMessage("deploy", f"{self.get_name()} has uncommitted changes. Committing...")))
             result = self.commit(message=(msg or "nex builder committed"))
             if not result.success:
                 return result
@@ -129,9 +391,9 @@ class Project:
                 push_required = True
 
         if needs_versioning:
-            click.echo(repr(ActionMessage("deploy",
-                                          f"{self.get_name()} has the  same version as the currently published one. "
-                                          f"Versioning...")))
+            messages.append(repr(ActionMessage("deploy",
+                                               f"{self.get_name()} has the  same version as the currently published "
+                                               f"one. Versioning...")))
             result = self.increment_version(version_type)
             if not result.success:
                 return result
@@ -140,7 +402,8 @@ class Project:
                 needs_publish = True
 
         if push_required:
-            click.echo(repr(ActionMessage("deploy", f"{self.get_name()} local repo is ahead of remote.  Pushing...")))
+            messages.append(repr(
+                ActionMessage("deploy", f"{self.get_name()} local repo is ahead of remote.  Pushing...")))
             result = self.push()
             if not result.success:
                 return result
@@ -148,7 +411,7 @@ class Project:
                 actions_taken.append("push")
 
         if needs_publish:
-            click.echo(repr(
+            messages.append(repr(
                 ActionMessage("deploy", f"{self.get_name()} local package version is ahead of remote. Publishing...")))
             result = self.publish()
             if not result.success:
@@ -164,7 +427,54 @@ class Project:
                                 f"{','.join(actions_taken)} ",
                                 True)
 
-    def _load_git_info(self):
+    @property
+    def git(self) -> Git:
+        # Every git operation is a plain command so a bare Git runner is enough.
+        if self._git is None:
+            self._git = Git(self.root_directory)
+            self._git.update_environment(**git_environment)
+
+        return self._git
+
+    @property
+    def branch_valid(self) -> bool:
+        self._load_git_info()
+        return self._branch_valid
+
+    @property
+    def remote_valid(self) -> bool:
+        self._load_git_info()
+        return self._remote_valid
+
+    @property
+    def ahead_count(self) -> int:
+        self._load_git_info()
+        return self._commit_counts[0]
+
+    @property
+    def behind_count(self) -> int:
+        self._load_git_info()
+        return self._commit_counts[1]
+
+    @property
+    def commits_ahead(self) -> List[Commit]:
+        # At most commit_list_limit commits, newest first.
+        return self._list_commits(f"{self.remote}/{self.branch}..{self.branch}")
+
+    @property
+    def commits_behind(self) -> List[Commit]:
+        return self._list_commits(f"{self.branch}..{self.remote}/{self.branch}")
+
+    def _list_commits(self, rev: str) -> List[Commit]:
+        if not (self.branch_valid and self.remote_valid):
+            return []
+
+        try:
+            return list(Repo(self.root_directory).iter_commits(rev, max_count=commit_list_limit))
+        except GitCommandError as e:
+            return []
+
+    def _load_git_info(self) -> None:
 
         if self._git_info_loaded:
             return
@@ -172,79 +482,129 @@ class Project:
         assert self.root_directory
         assert self.package_ob
 
-        if not self.repo:
-            self.repo = Repo(self.root_directory)
+        self._git_info_loaded = True
+        self._branch_valid = self.has_branch(self.branch)
+        self._remote_valid = self.has_remote(self.remote)
+        self._commit_counts = (0, 0)
+
+        try:
+            # The counts are against the last fetch of {remote}/{branch} (see ProjectManager.refresh_remotes).
+            if self.branch_valid and self.remote_valid and \
+                    f"refs/remotes/{self.remote}/{self.branch}" in self._get_refs():
+                # A single symmetric difference walk gives "<ahead>\t<behind>"
+                counts = self.git.rev_list('--left-right', '--count', f'{self.branch}...{self.remote}/{self.branch}')
+                ahead, behind = counts.split()
+                self._commit_counts = (int(ahead), int(behind))
+        except GitCommandError as e:
+            pass
+
+    def _get_porcelain(self) -> str:
+        # Cached until something that changes the tree or index resets self._porcelain.  A failing status isn't cached.
+        if self._porcelain is None:
+            self._porcelain = self.git.status("--porcelain=v2", "--untracked-files=no", "--no-renames")
 
-        if self.repo:
-            self.branch_valid = self.has_branch(self.branch)
-            self.remote_valid = self.has_remote(self.remote)
+        return self._porcelain
 
-            try:
-                if self.branch_valid and self.remote_valid:
-                    self.repo.git.fetch()
-                    self.commits_behind = [c for c in
-                                           self.repo.iter_commits(f'{self.branch}..{self.remote}/{self.branch}')]
-                    self.commits_ahead = [c for c in
-                                          self.repo.iter_commits(f'{self.remote}/{self.branch}..{self.branch}')]
-                    self._git_info_loaded = True
-            except GitCommandError as e:
-                pass
+    def fetch_remote(self) -> bool:
+        # Fetches only {remote}/{branch}, and only if the project has both the branch and the remote.
+        if not (self.has_branch(self.branch) and self.has_remote(self.remote)):
+            return False
+
+        # counts read before the fetch are out of date once it's done, so they're re-read on next use
+        self._git_info_loaded = False
+        self._refs = None
+        try:
+            self.git.fetch(*get_fetch_options(), self.remote, self.branch, kill_after_timeout=30)
+            return True
+        except GitCommandError as e:
+            logging.warning(f"Unable to fetch {self.remote} for {self.get_name()}: {describe_error(e)}")
+            return False
 
     def is_dirty(self) -> bool:
-        return self.repo.is_dirty()
+        return bool(self._get_porcelain())
+
+    def refresh_status(self) -> bool:
+        # Re-reads the cached status, for when the working tree may have been changed from outside.
+        self._porcelain = None
+        return self.is_dirty()
 
-    def has_keyword(self, kw):
-        if "keywords" in self.package_ob and isinstance(self.package_ob.keywords, list):
-            return kw in self.package_ob.keywords
+    def has_keyword(self, kw: str) -> bool:
+        package_keywords = self.package_ob.get("keywords")
+        if isinstance(package_keywords, list):
+            return kw in package_keywords
         else:
             return False
 
-    def has_branch(self, branch_name):
-        for b in self.repo.branches:
-            if b.name == branch_name:
-                return True
+    def _get_refs(self) -> FrozenSet[str]:
+        # Every local branch and remote-tracking ref, cleared by fetch_remote.
+        if self._refs is None:
+            try:
+                self._refs = frozenset(self.git.for_each_ref('--format=%(refname)', 'refs/heads',
+                                                             'refs/remotes').splitlines())
+            except GitCommandError as e:
+                self._refs = frozenset()
 
-        return False
+        return self._refs
 
-    def has_remote(self, remote_name):
-        for r in self.repo.remotes:
-            if r.name == remote_name:
-                return True
+    def has_branch(self, branch_name: str) -> bool:
+        return f"refs/heads/{branch_name}" in self._get_refs()
 
-        return False
+    def has_remote(self, remote_name: str) -> bool:
+        # the configured remotes are listed once and kept as a set
+        if self._remotes is None:
+            try:
+                self._remotes = frozenset(self.git.remote().splitlines())
+            except GitCommandError as e:
+                self._remotes = frozenset()
+
+        return remote_name in self._remotes
 
-    def get_name(self, without_scope=False):
-        n: str = self.package_ob['name']
-        if without_scope:
-            scope_index = n.rfind("/")
-            if scope_index != -1:
-                return n[scope_index + 1:]
+    def get_name(self, without_scope: bool = False) -> str:
+        return self._short_name if without_scope else self._name
 
-        return n
+    def get_version(self) -> Optional[str]:
+        return self.package_ob.get('version')
 
-    def get_version(self):
-        return self.package_ob['version']
+    def is_module(self) -> bool:
+        return self.has_keyword("nexus-module")
 
-    def is_module(self):
-        return "nexus-module" in self.package_ob['keywords']['@nexus-switchboard/nexus-extend']
+    def is_connection(self) -> bool:
+        return self.has_keyword("nexus-connection")
 
-    def is_connection(self):
-        return "nexus-connection" in self.package_ob['dependencies']['@nexus-switchboard/nexus-extend']
+    def is_core(self) -> bool:
+        return self._name == 'nexus-core'
 
-    def is_core(self):
-        return self.package_ob['name'] == 'nexus-core'
+    def is_extender(self) -> bool:
+        return self._name == 'nexus-extend'
 
-    def is_extender(self):
-        return self.package_ob['name'] == 'nexus-extend'
+    def cached_remote_version(self) -> Optional[str]:
+        # The published version as last looked up, by this run or an earlier one, without asking the registry.
+        return self._latest_remote_version or version_cache.get(self._name, None)
 
-    def _get_latest_remote_version(self) -> str:
+    def _get_latest_remote_version(self, max_age: float = version_max_age) -> str:
+        # Lookups older than max_age are redone.  A stale one is kept if the registry fails, unless max_age is 0.
         if self._latest_remote_version:
             return self._latest_remote_version
 
-        params = ["npm", "show", self.package_ob.name, "version"]
+        if max_age > 0:
+            cached = version_cache.get(self._name, max_age)
+            if cached:
+                return cached
 
-        ver = self._run_command_for_str(params).decode('utf-8')
+        params = ["npm", "show", self._name, "version"]
 
+        try:
+            # npm ends the version with a newline, which semver won't parse
+            ver = self._run_command_for_str(params).decode('utf-8').strip()
+        except (OSError, subprocess.SubprocessError) as e:
+            stale = version_cache.get(self._name, None) if max_age > 0 else None
+            if not stale:
+                raise
+            logging.warning(f"Unable to look up the published version of {self._name}, showing the last known one: "
+                            f"{describe_error(e)}")
+            return stale
+
+        version_cache.put(self._name, ver)
         self._latest_remote_version = ver
 
         return ver
@@ -255,10 +615,12 @@ class Project:
         if self.dry_run_mode:
             click.echo(repr(ActionResult("version", "There is no way to dry run the npm version command", None)))
 
+        # npm version rewrites package.json and commits it, so wait for it and keep what it printed (the new version)
         stdout, stderr, returncode = self._run_command(params)
+        self._porcelain = None
 
         if returncode == 0:
-            return ActionResult("increment_version", stdout or "Completed successfully", True)
+            return ActionResult("increment_version", stdout.strip() or "Completed successfully", True)
         else:
             logging.error(stderr)
             return ActionResult("increment_version", f"Failed with return code {returncode}", False)
@@ -272,7 +634,11 @@ class Project:
         stdout, stderr, returncode = self._run_command(params)
 
         if returncode == 0:
-            return ActionResult("publish", stdout or "Completed successfully", True)
+            if not self.dry_run_mode:
+                # the registry has a new version now, whatever was looked up before
+                self._latest_remote_version = None
+                version_cache.discard(self._name)
+            return ActionResult("publish", stdout.strip() or "Completed successfully", True)
         else:
             logging.error(stderr)
             return ActionResult("publish", f"Failed with return code {returncode}", False)
@@ -285,16 +651,16 @@ class Project:
         stdout, stderr, returncode = self._run_command(params)
 
         if returncode == 0:
-            return ActionResult("update", stdout or "Completed successfully", True)
+            return ActionResult("update", stdout.strip() or "Completed successfully", True)
         else:
             logging.error(stderr)
             return ActionResult("update", f"Failed with return code {returncode}", False)
 
-    def need_push(self):
-        return len(self.commits_ahead) > 0
+    def need_push(self) -> bool:
+        return self.ahead_count > 0
 
-    def need_fetch(self):
-        return len(self.commits_behind) > 0
+    def need_fetch(self) -> bool:
+        return self.behind_count > 0
 
     def pull(self) -> ActionResult:
         if not self.branch_valid:
@@ -303,9 +669,10 @@ class Project:
             return ActionResult("pull", f"Unable to pull because remote {self.remote} could not be found", False)
 
         try:
-            if len(self.commits_behind) > 0:
-                if not self.commits_ahead:
-                    self.repo.git.pull(self.remote, self.branch)
+            if self.behind_count > 0:
+                if self.ahead_count == 0:
+                    self.git.pull(self.remote, self.branch)
+                    self._porcelain = None
                     return ActionResult("pull", "Pull completed successfully", True)
                 else:
                     return ActionResult("pull", "Cannot pull while your branch is ahead of remote", False)
@@ -314,17 +681,17 @@ class Project:
         except GitCommandError as e:
             return ActionResult(action="pull", message=str(e), success=False)
 
-    def link_global(self):
+    def link_global(self) -> ActionResult:
         params = ["npm", "link"]
         stdout, stderr, returncode = self._run_command(params)
 
         if returncode == 0:
             return ActionResult("link_global", "Local npm repo now points to local package", True)
         else:
-            return ActionResult("link_global", f"Failed with errorcode {returncode}: {stderr}", False)
+            return ActionResult("link_global", f"Failed with errorcode {returncode}: {stderr.strip()}", False)
 
-    def link(self, to) -> ActionResult:
-        params = ["npm", "link", to.package_ob.name]
+    def link(self, to: "Project") -> ActionResult:
+        params = ["npm", "link", to.get_name()]
         if self.dry_run_mode:
             params.append("--dry-run")
 
@@ -333,29 +700,29 @@ class Project:
         if returncode == 0:
             return ActionResult("link", "Local npm repo now points to local package", True)
         else:
+            logging.error(stderr)
             return ActionResult("link", f"Failed with errorcode {returncode}", False)
 
     def commit(self, message: str) -> ActionResult:
 
         try:
-            self.repo.git.add(".")
+            self.git.add(".")
+            self._porcelain = None
         except GitCommandError as e:
             return ActionResult(action="stage", message=str(e), success=False)
 
+        # No status check first - git commit says so itself (and fails) when there's nothing staged.
         try:
-            if self.is_dirty():
-                params = ["-m", message]
-                if self.dry_run_mode:
-                    params.append("--dry-run")
-
-                self.repo.git.commit(*params)
-                return ActionResult(action="commit", message="Operation completed successfully", success=True)
+            params = ["-m", message]
+            if self.dry_run_mode:
+                params.append("--dry-run")
 
-            else:
-                return ActionResult(action="commit", message="Nothing to do: working directory clean", success=True)
+            self.git.commit(*params)
+            self._porcelain = None
+            return ActionResult(action="commit", message="Operation completed successfully", success=True)
 
         except GitCommandError as e:
-            if e.stdout.find("working directory clean") == -1:
+            if not clean_pattern.search(e.stdout):
                 return ActionResult(action="commit", message=e.stdout, success=False)
             else:
                 return ActionResult(action="commit", message="Nothing to do: working directory clean", success=True)
@@ -367,89 +734,68 @@ class Project:
             if self.dry_run_mode:
                 params.append("--dry-run")
 
-            self.repo.git.push(*params)
+            self.git.push(*params)
 
             return ActionResult(action="push", message="Operation completed successfully", success=True)
         except GitCommandError as e:
             logging.error(e.stderr)
             return ActionResult(action="push", message=e.stdout, success=False)
 
-    def reset(self):
+    def reset(self) -> ActionResult:
 
         try:
-            self.repo.git.reset()
-            self.repo.git.checkout(".")
+            self.git.reset()
+            self.git.checkout(".")
+            self._porcelain = None
             return ActionResult(action="reset", message="Operation completed successfully", success=True)
 
         except GitCommandError as e:
             return ActionResult(action="reset", message=str(e), success=False)
 
-    def _run_command_for_str(self, command_array):
-        return subprocess.check_output(command_array, cwd=self.root_directory)
+    def _run_command_for_str(self, command_array: List[str]) -> bytes:
+        # Raises CalledProcessError (carrying what the command wrote to stderr) or TimeoutExpired on failure.
+        return subprocess.run(command_array, cwd=self.root_directory, capture_output=True, check=True,
+                              timeout=command_timeout).stdout
+
+    def _run_command(self, command_array: List[str]) -> Tuple[str, str, int]:
+        # A command that can't be started or doesn't finish in time is reported with -1 as its code.
+        try:
+            result = subprocess.run(command_array, cwd=self.root_directory, capture_output=True, text=True,
+                                    check=False, timeout=command_timeout)
+        except subprocess.TimeoutExpired as e:
+            return "", f"{' '.join(command_array)} did not finish within {command_timeout} seconds", -1
+        except OSError as e:
+            return "", f"Unable to run {command_array[0]}: {e}", -1
 
-    def _run_command(self, command_array) -> (str, str):
-        p = subprocess.Popen(command_array, cwd=self.root_directory, stderr=subprocess.DEVNULL,
-                             stdout=subprocess.DEVNULL)
-        stdout, stderr = p.communicate()
-        return stdout, stderr, p.returncode
+        return result.stdout, result.stderr, result.returncode
 
 
 class ProjectManager:
 
     def __init__(self, root_directory: str, branch: str, remote: str,
-                 dry_run: bool = False, project: Project = None, projtype: str = None):
+                 dry_run: bool = False, project: Optional[str] = None, projtype: Optional[str] = None,
+                 pruned: Optional[Iterable[str]] = None):
         self.root_directory: str = root_directory
+        self.pruned_dirs: FrozenSet[str] = pruned_dirs if pruned is None else frozenset(pruned)
         self.projects: List[Project] = []
+        self._by_name: Dict[str, Project] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
         self.branch = branch
         self.remote = remote
-        self.filter = Munch({
-            "project": project,
-            "projtype": projtype
-        })
+        self.project_filter = project
+        self.type_filter = projtype
 
         self._load_projects(dry_run)
 
     def _load_projects(self, dry_run: bool = False) -> int:
         assert self.root_directory
 
-        gatheredProjects = []
-        for subdir, dirs, files in os.walk(self.root_directory):
-            if 'package.json' in files:
-
-                if '.git' not in dirs:
-                    # don't bother with any projects that are not git initialized
-                    continue
-
-                ob = Project.load_npm_package(os.path.join(subdir, "package.json"))
-                if not ob:
-                    # The package.json could not be loaded.
-                    continue
-
-                ob = DefaultMunch(None, ob)
-                if self.filter.project and ob.name and \
-                        (ob.name not in self.filter.project) and \
-                        (self.filter.project not in ob.name):
-                    # the filter is looking for a single project by a certain name.
-                    continue
-
-                if self.filter.projtype and not ob.keywords:
-                    # if there's no keywords and one is specified in the filter then skip
-                    continue
-
-                if self.filter.projtype and ob.keywords and (self.filter.projtype not in ob.keywords):
-                    # the filter is looking for a certain project type
-                    continue
-
-                # Now we can load the project assuming all the last checks passed.
-                gatheredProjects.append(Munch({
-                    "ob": ob.copy(),
-                    "subdir": subdir,
-                    "dirs": dirs.copy(),
-                    "files": files.copy()
-                }))
-
-                # we're in an npm package - go ahead and clear out all subdirs (we don't want to descend any further)
-                dirs.clear()
+        gatheredProjects = self._find_project() if self.project_filter else []
+        if not gatheredProjects:
+            package_dirs = self._find_package_dirs()
+            if package_dirs is None:
+                package_dirs = self._walk_package_dirs()
+            gatheredProjects = self._gather_package_dirs(package_dirs)
 
         with click.progressbar(gatheredProjects, label=f"Loading {len(gatheredProjects)} projects:") as bar:
             for p in bar:
@@ -457,12 +803,203 @@ class ProjectManager:
                                branch=self.branch, dry_run_mode=dry_run)
                 if proj:
                     self.projects.append(proj)
+                    # the first project with a given name wins
+                    self._by_name.setdefault(proj.get_name(without_scope=True), proj)
 
         return len(self.projects)
 
+    def _gather_project(self, subdir: str, dirs: List[str], files: List[str]) -> Optional[ProjectSpec]:
+        if '.git' not in dirs:
+            # don't bother with any projects that are not git initialized
+            return None
+
+        ob = Project.load_npm_package(os.path.join(subdir, "package.json"))
+        if not ob:
+            # The package.json could not be loaded.
+            return None
+
+        name = ob.get("name")
+        package_keywords = ob.get("keywords")
+        if self.project_filter and name and \
+                (name not in self.project_filter) and \
+                (self.project_filter not in name):
+            # the filter is looking for a single project by a certain name.
+            return None
+
+        if self.type_filter and not package_keywords:
+            # if there's no keywords and one is specified in the filter then skip
+            return None
+
+        if self.type_filter and package_keywords and (self.type_filter not in package_keywords):
+            # the filter is looking for a certain project type
+            return None
+
+        # Now we can load the project assuming all the last checks passed.
+        return ProjectSpec(ob, subdir, dirs, files)
+
+    def _gather_directory(self, path: str) -> Optional[ProjectSpec]:
+        # Lists the one directory, classifying entries with the file type returned by scandir rather than a stat each.
+        dirs: List[str] = []
+        files: List[str] = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.name)
+                    else:
+                        files.append(entry.name)
+        except OSError:
+            return None
+
+        return self._gather_project(path, dirs, files) if 'package.json' in files else None
+
+    def _find_package_dirs(self) -> Optional[List[str]]:
+        # Lists the package.json directories with find, or returns None so the caller falls back to _walk_package_dirs.
+        if os.name != "posix":
+            return None
+
+        prune: List[str] = []
+        for d in sorted(self.pruned_dirs):
+            prune += ["-name", d, "-o"]
+
+        # -H follows a symlinked root and -mindepth 1 keeps the root itself from being pruned.
+        params = ["find", "-H", self.root_directory, "-mindepth", "1"]
+        if prune:
+            params += ["(", *prune[:-1], ")", "-prune", "-o"]
+        params += ["-name", "package.json", "!", "-type", "d", "-print0"]
+        try:
+            result = subprocess.run(params, capture_output=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+
+        # find exits non-zero for unreadable directories, so it has only failed if it listed nothing.
+        if result.returncode != 0 and not result.stdout:
+            return None
+
+        return [os.path.dirname(os.fsdecode(f)) for f in result.stdout.split(b"\0") if f]
+
+    def _walk_package_dirs(self) -> List[str]:
+        # Lists the tree a level at a time, with every directory on a level listed in parallel.
+        package_dirs: List[str] = []
+        level = [self.root_directory]
+        while level:
+            next_level: List[str] = []
+            for path, subdirs, has_package in self._get_pool().map(self._list_directory, level):
+                if has_package:
+                    package_dirs.append(path)
+                next_level.extend(subdirs)
+            level = next_level
+
+        return package_dirs
+
+    def _list_directory(self, path: str) -> Tuple[str, List[str], bool]:
+        # Returns the directory's unpruned subdirectories and whether it holds a package.json.
+        subdirs: List[str] = []
+        has_package = False
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in self.pruned_dirs:
+                            subdirs.append(entry.path)
+                    elif entry.name == "package.json":
+                        has_package = True
+        except OSError:
+            pass
+
+        return path, subdirs, has_package
+
+    def _gather_package_dirs(self, package_dirs: List[str]) -> List[ProjectSpec]:
+        gathered: List[ProjectSpec] = []
+        accepted: Set[str] = set()
+
+        # Loading a package is a directory listing and a file read, so every candidate is loaded in parallel first.
+        package_dirs = sorted(package_dirs)
+        specs = list(self._get_pool().map(self._gather_directory, package_dirs)) if package_dirs else []
+
+        # Every directory sorts after its parents so anything inside an accepted project can be skipped.
+        for subdir, spec in zip(package_dirs, specs):
+            parent = subdir
+            while parent not in accepted and os.path.dirname(parent) != parent:
+                parent = os.path.dirname(parent)
+
+            if parent in accepted or not spec:
+                continue
+
+            gathered.append(spec)
+            accepted.add(subdir)
+
+        return gathered
+
+    def _find_project(self) -> List[ProjectSpec]:
+        # A single requested project is looked for where projects normally live before walking the whole tree.
+        name = self.project_filter
+        candidates = [self.root_directory]
+        for parent in [self.root_directory] + [os.path.join(self.root_directory, d) for d in monorepo_dirs]:
+            try:
+                with os.scandir(parent) as it:
+                    candidates.extend(e.path for e in it
+                                      if e.is_dir(follow_symlinks=False) and e.name not in self.pruned_dirs)
+            except OSError:
+                continue
+
+        # a directory named after the project is the most likely hit so check those first
+        candidates.sort(key=lambda c: os.path.basename(c) != name)
+
+        for candidate in candidates:
+            spec = self._gather_directory(candidate)
+            found = spec.ob.get("name") if spec else None
+            if spec and found and name in (found, found[found.rfind("/") + 1:], os.path.basename(candidate)):
+                return [spec]
+
+        return []
+
     def get_projects(self) -> List[Project]:
         return self.projects
 
-    def find_by_name(self, name: str) -> Project:
-        matching = [p for p in self.projects if p.get_name(without_scope=True) == name]
-        return None if len(matching) == 0 else matching[0]
+    def refresh_remotes(self) -> List[bool]:
+        # Fetches every project's remote and reads its git state in parallel.
+        def refresh(proj: Project) -> bool:
+            fetched = proj.fetch_remote()
+            proj._load_git_info()
+            return fetched
+
+        return self.map(refresh)
+
+    def prefetch_remote_versions(self, max_age: float = version_max_age) -> None:
+        # Looks up every project's published version in parallel.  Failures are left for the project's own lookup.
+        def prefetch(proj: Project) -> None:
+            try:
+                proj._get_latest_remote_version(max_age)
+            except (OSError, subprocess.SubprocessError) as e:
+                pass
+
+        self.map(prefetch)
+
+    def load_git_info(self) -> None:
+        # Reads every project's branch/remote/ahead/behind state concurrently without fetching.
+        self.map(Project._load_git_info)
+
+    def map(self, fn: Callable[..., Any], *args, action: Optional[str] = None) -> List[Any]:
+        # Runs fn(project, *args) for every project in parallel.  A project that raises gets a failed ActionResult.
+        if not self.projects:
+            return []
+
+        def run(proj: Project) -> Any:
+            try:
+                return fn(proj, *args)
+            except Exception as e:
+                return ActionResult(action or str(getattr(fn, "__name__", "run")),
+                                    f"{proj.get_name()} failed with {type(e).__name__}: {e}", False)
+
+        return list(self._get_pool().map(run, self.projects))
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        # One pool serves every batch.  Work running on it must not wait on more work submitted to it.
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=32)
+
+        return self._pool
+
+    def find_by_name(self, name: str) -> Optional[Project]:
+        return self._by_name.get(name)